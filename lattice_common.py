@@ -0,0 +1,105 @@
+"""
+Helpers and drawing constants shared by the interactive visualizer
+(lattice_visualizer.py) and the static renderer (lattice_static.py).
+"""
+import base64
+import os
+
+import numpy as np
+import pandas as pd
+
+# Fixed vertical size of element rectangles and y-spacing between file rows
+FIXED_ELEMENT_HEIGHT = 2.0
+OFFSET_STEP = 5
+
+# Colors shared by the interactive plot and the static renderer
+RECT_LINE_COLOR = "RoyalBlue"
+RECT_FILL_COLOR = "LightSkyBlue"
+RECT_OPACITY = 0.3
+LINE_COLORS = {
+    "zero_length": "Red",
+    "up_only": "Orange",
+    "single_ct": "Green",
+    "dn_only": "Purple",
+}
+CRYOMODULE_COLOR = "Gray"
+CRYOMODULE_OPACITY = 0.4
+
+def get_icon_name(element):
+    """Take the first three dash-delimited parts as icon name, trimming whitespace."""
+    element = element.strip()
+    return "-".join(element.split("-")[:3])
+
+def clean_element_name(element):
+    """Remove _UP, _CT, _DN from element name."""
+    return element.replace("_UP", "").replace("_CT", "").replace("_DN", "")
+
+def encode_image_to_base64(image_path):
+    """
+    Convert a PNG or SVG file to a base64 data URI string.
+    """
+    file_extension = os.path.splitext(image_path)[1].lower()
+    if file_extension == ".svg":
+        mime_type = "image/svg+xml"
+    elif file_extension == ".png":
+        mime_type = "image/png"
+    else:
+        mime_type = "image/png"
+
+    with open(image_path, 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode('ascii')
+    return f"data:{mime_type};base64,{encoded}"
+
+def generate_symmetric_offsets(n, step):
+    """
+    Generate a list of y-offsets, symmetric about y=0, spaced by 'step'.
+    """
+    offsets = []
+    if n % 2 == 1:
+        offsets.append(0)
+        for i in range(1, (n // 2) + 1):
+            offsets.append(i * step)
+            offsets.append(-i * step)
+    else:
+        for i in range(1, (n // 2) + 1):
+            offsets.append(i * step)
+            offsets.append(-i * step)
+    return offsets[:n]
+
+def read_lattice_file(file_path):
+    """
+    Read one Excel deck and clean it the same way for every tool: numeric
+    location (column #4, invalid rows dropped), stripped element names
+    (column #1) and no cryomodule _CT rows. Returns (names, locations) arrays.
+    """
+    df = pd.read_excel(file_path)
+    df.iloc[:, 4] = pd.to_numeric(df.iloc[:, 4], errors="coerce")
+    df = df.dropna(subset=[df.columns[4]])
+    df.iloc[:, 1] = df.iloc[:, 1].astype(str).fillna('').str.strip()
+    df = df[~df.iloc[:, 1].str.contains('CM') | ~df.iloc[:, 1].str.contains('_CT')]
+    return df.iloc[:, 1].to_numpy(dtype=object), df.iloc[:, 4].to_numpy(dtype=float)
+
+def extract_cryomodules(names, locations, cryomodules=None):
+    """
+    Collect cryomodule _UP/_DN locations by name into 'cryomodules'
+    ({name: [start, end]}, created if None) and return it. Passing the same
+    dict for several decks merges cryomodules by name.
+    """
+    if cryomodules is None:
+        cryomodules = {}
+    for element, location in zip(names, locations):
+        if 'CM' in element and ('_UP' in element or '_DN' in element):
+            cm_name = element.replace('_UP', '').replace('_DN', '')
+            bounds = cryomodules.setdefault(cm_name, [None, None])
+            if '_UP' in element:
+                bounds[0] = location
+            elif '_DN' in element:
+                bounds[1] = location
+    return cryomodules
+
+def cryomodule_spans(cryomodules):
+    """
+    Return an (n, 2) array of [start, end] for cryomodules with both _UP and _DN.
+    """
+    spans = [sorted(b) for b in cryomodules.values() if None not in b]
+    return np.asarray(spans, dtype=float).reshape(-1, 2)
@@ -0,0 +1,351 @@
+"""
+Static (non-interactive) SVG/PNG renderer for lattice decks.
+
+Draws straight from per-deck element arrays instead of going through a Plotly
+page and a headless browser, so hundreds of lattice revisions can be turned
+into thumbnails or report figures quickly.
+
+Usage:
+    python lattice_static.py deck1.xlsx deck2.xlsx --icons icons/ --out renders/
+    python lattice_static.py decks/*.xlsx --format png --jobs 8
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from lattice_common import (
+    CRYOMODULE_COLOR,
+    CRYOMODULE_OPACITY,
+    FIXED_ELEMENT_HEIGHT,
+    LINE_COLORS,
+    OFFSET_STEP,
+    RECT_FILL_COLOR,
+    RECT_LINE_COLOR,
+    RECT_OPACITY,
+    clean_element_name,
+    cryomodule_spans,
+    encode_image_to_base64,
+    extract_cryomodules,
+    generate_symmetric_offsets,
+    get_icon_name,
+    read_lattice_file,
+)
+
+# Output geometry (pixels)
+DEFAULT_WIDTH = 2400
+ROW_HEIGHT_PX = 40
+MARGIN_PX = dict(left=20, right=20, top=30, bottom=40)
+
+@lru_cache(maxsize=None)
+def _cached_icon_uri(icon_path):
+    """Encode each icon once per process; decks share most of their icons."""
+    if not os.path.exists(icon_path):
+        return None
+    return encode_image_to_base64(icon_path)
+
+def extract_elements(names, locations, classifier=None):
+    """
+    Turn a deck's name/location columns into element arrays.
+
+    Follows the interactive plot's _UP/_CT/_DN pairing rules in a single
+    backward and a single forward pass. Returns a DataFrame with columns
+    'kind' ('rect' or one of LINE_COLORS), 'x0', 'x1', 'name' and 'icon',
+    plus 'type' when an ElementClassifier is given (rendering does not need it).
+    """
+    n = len(names)
+    clean = [clean_element_name(e) for e in names]
+    has_up = np.array(['_UP' in e for e in names], dtype=bool)
+    has_ct = np.array(['_CT' in e for e in names], dtype=bool)
+    has_dn = np.array(['_DN' in e for e in names], dtype=bool)
+    is_cm = np.array(['CM' in e for e in names], dtype=bool)
+
+    # Backward pass: nearest later _DN / central _CT / any _CT per clean name
+    next_dn = [None] * n
+    next_ct_central = [None] * n
+    next_ct_any = [None] * n
+    later_dn, later_ct_central, later_ct_any = {}, {}, {}
+    for i in range(n - 1, -1, -1):
+        name = clean[i]
+        next_dn[i] = later_dn.get(name)
+        next_ct_central[i] = later_ct_central.get(name)
+        next_ct_any[i] = later_ct_any.get(name)
+        if has_dn[i]:
+            later_dn[name] = locations[i]
+        if has_ct[i]:
+            later_ct_any[name] = locations[i]
+            if '_P1_' not in names[i] and '_P2_' not in names[i]:
+                later_ct_central[name] = locations[i]
+
+    kinds, x0s, x1s, out_names, icons = [], [], [], [], []
+
+    def add(kind, x0, x1, i):
+        kinds.append(kind)
+        x0s.append(x0)
+        x1s.append(x1)
+        out_names.append(clean[i])
+        icons.append(get_icon_name(names[i]))
+
+    # Forward pass: classify each row the way the interactive plot does
+    seen_up = set()
+    for i in range(n):
+        if has_up[i]:
+            seen_up.add(clean[i])
+        if is_cm[i]:
+            continue
+        location = locations[i]
+        if has_up[i]:
+            dn_location = next_dn[i]
+            if dn_location is None:
+                add("up_only", location, location, i)
+                continue
+            if next_ct_central[i] is None and next_ct_any[i] is None:
+                continue
+            if dn_location - location == 0:
+                add("zero_length", location, location, i)
+            else:
+                add("rect", location, dn_location, i)
+        elif has_ct[i]:
+            between_up_dn = (i > 0 and has_up[i - 1]) and (i + 1 < n and has_dn[i + 1])
+            if not between_up_dn:
+                add("single_ct", location, location, i)
+        elif has_dn[i] and clean[i] not in seen_up:
+            add("dn_only", location, location, i)
+
+    elements = pd.DataFrame({
+        "kind": kinds,
+        "x0": np.asarray(x0s, dtype=float),
+        "x1": np.asarray(x1s, dtype=float),
+        "name": out_names,
+        "icon": icons,
+    })
+    if classifier is not None:
+        elements["type"] = classifier.classify_many(elements["icon"])
+    return elements
+
+def _nice_tick_step(span, target_ticks=10):
+    """Pick a 1/2/5 x 10^k tick spacing giving roughly 'target_ticks' ticks."""
+    if span <= 0:
+        return 1.0
+    raw = span / target_ticks
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+def render_svg(file_paths, icon_folder=None, width=DEFAULT_WIDTH, title=None):
+    """
+    Render one or more deck files (stacked with symmetric y-offsets, like the
+    interactive plot) into an SVG document string.
+    """
+    y_offsets = generate_symmetric_offsets(len(file_paths), OFFSET_STEP)
+    decks = [read_lattice_file(p) for p in file_paths]
+    elements = [extract_elements(names, locs) for names, locs in decks]
+    cryomodules = {}
+    for names, locs in decks:
+        extract_cryomodules(names, locs, cryomodules)
+    cm_spans = cryomodule_spans(cryomodules)
+
+    all_x = [df[["x0", "x1"]].to_numpy().ravel() for df in elements] + [cm_spans.ravel()]
+    all_x = np.concatenate(all_x) if all_x else np.empty(0)
+    x_min, x_max = (all_x.min(), all_x.max()) if all_x.size else (0.0, 1.0)
+    if x_max <= x_min:
+        x_min, x_max = x_min - 0.5, x_min + 0.5
+
+    y_min = min(y_offsets) - 2
+    y_max = max(y_offsets) + 2
+    plot_w = width - MARGIN_PX["left"] - MARGIN_PX["right"]
+    plot_h = ROW_HEIGHT_PX * (y_max - y_min) / FIXED_ELEMENT_HEIGHT
+    height = int(round(plot_h + MARGIN_PX["top"] + MARGIN_PX["bottom"]))
+    sx = plot_w / (x_max - x_min)
+    sy = plot_h / (y_max - y_min)
+
+    def px(x):
+        return MARGIN_PX["left"] + (np.asarray(x) - x_min) * sx
+
+    def py(y):
+        return MARGIN_PX["top"] + (y_max - np.asarray(y)) * sy
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        '<rect width="100%" height="100%" fill="white"/>',
+    ]
+    if title:
+        parts.append(f'<text x="{MARGIN_PX["left"]}" y="20" font-family="sans-serif" '
+                     f'font-size="14">{escape(title)}</text>')
+
+    # Cryomodules span every file row
+    if len(cm_spans):
+        cm_y0 = py(max(y_offsets) + 1)
+        cm_h = (max(y_offsets) - min(y_offsets) + 2) * sy
+        parts.append(f'<g fill="{CRYOMODULE_COLOR}" stroke="{CRYOMODULE_COLOR}" '
+                     f'opacity="{CRYOMODULE_OPACITY}">')
+        for x0, w in zip(px(cm_spans[:, 0]), (cm_spans[:, 1] - cm_spans[:, 0]) * sx):
+            parts.append(f'<rect x="{x0:.2f}" y="{cm_y0:.2f}" width="{w:.2f}" height="{cm_h:.2f}"/>')
+        parts.append('</g>')
+
+    for df, y_offset in zip(elements, y_offsets):
+        rects = df[df["kind"] == "rect"]
+        # A _DN before its _UP gives x1 < x0; SVG drops negative widths, so
+        # normalise like cryomodule_spans does (Plotly accepts either order)
+        rect_x0 = rects["x0"].to_numpy()
+        rect_x1 = rects["x1"].to_numpy()
+        rect_x = px(np.minimum(rect_x0, rect_x1))
+        rect_w = np.abs(rect_x1 - rect_x0) * sx
+        rect_y = py(y_offset + FIXED_ELEMENT_HEIGHT / 2)
+        rect_h = FIXED_ELEMENT_HEIGHT * sy
+
+        parts.append(f'<g fill="{RECT_FILL_COLOR}" stroke="{RECT_LINE_COLOR}" '
+                     f'opacity="{RECT_OPACITY}">')
+        for x0, w in zip(rect_x, rect_w):
+            parts.append(f'<rect x="{x0:.2f}" y="{rect_y:.2f}" width="{w:.2f}" height="{rect_h:.2f}"/>')
+        parts.append('</g>')
+
+        if icon_folder:
+            for x0, w, icon in zip(rect_x, rect_w, rects["icon"]):
+                uri = _cached_icon_uri(os.path.join(icon_folder, f"{icon}.svg"))
+                if uri is not None:
+                    parts.append(f'<image x="{x0:.2f}" y="{rect_y:.2f}" width="{w:.2f}" '
+                                 f'height="{rect_h:.2f}" preserveAspectRatio="none" '
+                                 f'xlink:href="{uri}"/>')
+
+        line_y0 = py(y_offset + 0.5)
+        line_y1 = py(y_offset - 0.5)
+        for kind, color in LINE_COLORS.items():
+            xs = px(df.loc[df["kind"] == kind, "x0"].to_numpy())
+            if not len(xs):
+                continue
+            parts.append(f'<g stroke="{color}" stroke-dasharray="4,3">')
+            for x in xs:
+                parts.append(f'<line x1="{x:.2f}" y1="{line_y0:.2f}" x2="{x:.2f}" y2="{line_y1:.2f}"/>')
+            parts.append('</g>')
+
+    # Longitudinal axis
+    axis_y = MARGIN_PX["top"] + plot_h
+    parts.append('<g stroke="black" font-family="sans-serif" font-size="11">')
+    parts.append(f'<line x1="{px(x_min):.2f}" y1="{axis_y:.2f}" x2="{px(x_max):.2f}" y2="{axis_y:.2f}"/>')
+    step = _nice_tick_step(x_max - x_min)
+    ticks = np.arange(np.ceil(x_min / step) * step, x_max + step / 2, step)
+    # arange's half-step stop can overshoot; keep ticks on the axis line
+    for tick in ticks[ticks <= x_max + step * 1e-9]:
+        tx = px(tick)
+        parts.append(f'<line x1="{tx:.2f}" y1="{axis_y:.2f}" x2="{tx:.2f}" y2="{axis_y + 5:.2f}"/>')
+        parts.append(f'<text x="{tx:.2f}" y="{axis_y + 18:.2f}" stroke="none" '
+                     f'text-anchor="middle">{tick:g}</text>')
+    parts.append(f'<text x="{MARGIN_PX["left"] + plot_w / 2:.2f}" y="{height - 4}" stroke="none" '
+                 f'text-anchor="middle">Longitudinal Position (m)</text>')
+    parts.append('</g>')
+
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+def svg_to_png(svg_text, output_path):
+    """
+    Rasterize an SVG string to PNG. Needs the optional 'cairosvg' package.
+    """
+    try:
+        import cairosvg
+    except ImportError as exc:
+        raise ImportError("PNG output requires 'cairosvg' (pip install cairosvg); "
+                          "use --format svg otherwise.") from exc
+    cairosvg.svg2png(bytestring=svg_text.encode("utf-8"), write_to=output_path)
+
+def render_deck(file_paths, output_path, icon_folder=None, width=DEFAULT_WIDTH):
+    """
+    Render deck file(s) to 'output_path'; the extension (.svg or .png) picks the format.
+    """
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    title = ", ".join(os.path.basename(p) for p in file_paths)
+    svg_text = render_svg(file_paths, icon_folder=icon_folder, width=width, title=title)
+    if output_path.lower().endswith(".png"):
+        svg_to_png(svg_text, output_path)
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(svg_text)
+    return output_path
+
+def _render_deck_job(args):
+    return render_deck(*args)
+
+def batch_output_paths(deck_paths, output_dir, fmt="svg"):
+    """
+    Map each deck to a unique output path under 'output_dir'.
+
+    Outputs keep the deck's path relative to the decks' common parent folder,
+    so 'rev1/linac.xlsx' and 'rev2/linac.xlsx' become 'rev1/linac.<fmt>' and
+    'rev2/linac.<fmt>'. If no common parent exists, clashing names get a
+    numeric suffix instead.
+    """
+    abs_paths = [os.path.abspath(p) for p in deck_paths]
+    try:
+        root = os.path.commonpath([os.path.dirname(p) for p in abs_paths])
+        rel_paths = [os.path.relpath(p, root) for p in abs_paths]
+    except ValueError:
+        rel_paths = [os.path.basename(p) for p in abs_paths]
+
+    outputs, used = [], set()
+    for rel_path in rel_paths:
+        stem = os.path.splitext(rel_path)[0]
+        candidate, n = f"{stem}.{fmt}", 1
+        while os.path.normcase(candidate) in used:
+            n += 1
+            candidate = f"{stem}_{n}.{fmt}"
+        used.add(os.path.normcase(candidate))
+        outputs.append(os.path.join(output_dir, candidate))
+    return outputs
+
+def render_batch(deck_paths, output_dir, fmt="svg", icon_folder=None,
+                 width=DEFAULT_WIDTH, jobs=None):
+    """
+    Render each deck file under 'output_dir' (see batch_output_paths) using a
+    process pool. Repeated deck paths are rendered once.
+    """
+    deck_paths = list(dict.fromkeys(os.path.abspath(p) for p in deck_paths))
+    output_paths = batch_output_paths(deck_paths, output_dir, fmt)
+    for output_path in output_paths:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    job_args = [
+        (path, output_path, icon_folder, width)
+        for path, output_path in zip(deck_paths, output_paths)
+    ]
+    if jobs == 1 or len(job_args) <= 1:
+        return [_render_deck_job(a) for a in job_args]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_render_deck_job, job_args))
+
+def main():
+    parser = argparse.ArgumentParser(description="Render lattice decks to static SVG/PNG.")
+    parser.add_argument("decks", nargs="+", help="Excel deck file(s)")
+    parser.add_argument("--icons", dest="icon_folder", default=None,
+                        help="folder containing element icons (SVG)")
+    parser.add_argument("--out", dest="output_dir", default="renders",
+                        help="output directory (default: renders)")
+    parser.add_argument("--format", dest="fmt", choices=["svg", "png"], default="svg")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="image width in pixels")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="parallel worker processes (default: CPU count)")
+    parser.add_argument("--stack", action="store_true",
+                        help="stack all decks in one figure instead of one image per deck")
+    args = parser.parse_args()
+
+    if args.stack:
+        os.makedirs(args.output_dir, exist_ok=True)
+        outputs = [render_deck(args.decks,
+                               os.path.join(args.output_dir, f"stacked.{args.fmt}"),
+                               icon_folder=args.icon_folder, width=args.width)]
+    else:
+        outputs = render_batch(args.decks, args.output_dir, fmt=args.fmt,
+                               icon_folder=args.icon_folder, width=args.width, jobs=args.jobs)
+    for path in outputs:
+        print(f"Static lattice image saved as: {path}")
+
+if __name__ == "__main__":
+    main()
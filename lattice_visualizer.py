@@ -3,77 +3,148 @@ import plotly.graph_objects as go
 import tkinter as tk
 from tkinter import filedialog
 import os
-import base64
 import json
+import numpy as np
+
+from element_classifier import ElementClassifier, find_type_rules
+from lattice_common import (
+    CRYOMODULE_COLOR,
+    CRYOMODULE_OPACITY,
+    FIXED_ELEMENT_HEIGHT,
+    LINE_COLORS,
+    OFFSET_STEP,
+    RECT_FILL_COLOR,
+    RECT_LINE_COLOR,
+    RECT_OPACITY,
+    clean_element_name,
+    cryomodule_spans,
+    encode_image_to_base64,
+    extract_cryomodules,
+    generate_symmetric_offsets,
+    get_icon_name,
+    read_lattice_file,
+)
 
-# If you want all rectangles to have a fixed vertical size:
-FIXED_ELEMENT_HEIGHT = 2.0
-
-def get_icon_name(element):
-    """Take the first three dash-delimited parts as icon name, trimming whitespace."""
-    element = element.strip()
-    return "-".join(element.split("-")[:3])
+# Number of longitudinal bins used for the precomputed mini-map density strips
+MINIMAP_BINS = 400
+MINIMAP_CRYOMODULE_ROW = "Cryomodules"
 
-def clean_element_name(element):
-    """Remove _UP, _CT, _DN from element name."""
-    return element.replace("_UP", "").replace("_CT", "").replace("_DN", "")
+def minimap_bin_edges(x_min, x_max, n_bins=MINIMAP_BINS):
+    """
+    Return 'n_bins + 1' evenly spaced bin edges covering [x_min, x_max].
+    A degenerate range is widened so every bin still has a positive width.
+    """
+    if not np.isfinite(x_min) or not np.isfinite(x_max):
+        x_min, x_max = 0.0, 1.0
+    if x_max <= x_min:
+        x_min, x_max = x_min - 0.5, x_min + 0.5
+    return np.linspace(x_min, x_max, n_bins + 1)
 
-def encode_image_to_base64(image_path):
+def bin_element_density(elements, n_rows, type_names, edges):
     """
-    Convert a PNG or SVG file to a base64 data URI string.
+    Histogram element positions into a (row, type, bin) count array.
+    'elements' is a DataFrame with 'file_index', 'type' and 'location' columns.
     """
-    file_extension = os.path.splitext(image_path)[1].lower()
-    if file_extension == ".svg":
-        mime_type = "image/svg+xml"
-    elif file_extension == ".png":
-        mime_type = "image/png"
-    else:
-        mime_type = "image/png"
+    counts = np.zeros((n_rows, len(type_names), len(edges) - 1), dtype=np.int64)
+    if elements.empty:
+        return counts
+
+    rows = elements["file_index"].to_numpy(dtype=np.int64)
+    types = pd.Categorical(elements["type"], categories=type_names).codes.astype(np.int64)
+    locs = elements["location"].to_numpy(dtype=float)
 
-    with open(image_path, 'rb') as f:
-        encoded = base64.b64encode(f.read()).decode('ascii')
-    return f"data:{mime_type};base64,{encoded}"
+    bins = np.searchsorted(edges, locs, side="right") - 1
+    bins = np.clip(bins, 0, len(edges) - 2)
+    np.add.at(counts, (rows, types, bins), 1)
+    return counts
 
-def generate_symmetric_offsets(n, step):
+def cryomodule_coverage(cryomodules, edges):
     """
-    Generate a list of y-offsets, symmetric about y=0, spaced by 'step'.
+    Fraction (0..1) of each mini-map bin covered by a complete cryomodule.
     """
-    offsets = []
-    if n % 2 == 1:
-        offsets.append(0)
-        for i in range(1, (n // 2) + 1):
-            offsets.append(i * step)
-            offsets.append(-i * step)
-    else:
-        for i in range(1, (n // 2) + 1):
-            offsets.append(i * step)
-            offsets.append(-i * step)
-    return offsets[:n]
-
-def guess_icon_type(icon_filename):
+    coverage = np.zeros(len(edges) - 1)
+    left, right = edges[:-1], edges[1:]
+    for start, end in cryomodule_spans(cryomodules):
+        coverage += np.clip(np.minimum(end, right) - np.maximum(start, left), 0, None)
+    return np.clip(coverage / (right - left), 0, 1)
+
+def build_minimap_figure(elements, row_labels, row_offsets, cryomodules, x_min, x_max,
+                         n_bins=MINIMAP_BINS):
     """
-    Very naive guess of 'type' based on partial substring matches in the icon filename.
-    Adjust for your actual naming conventions or logic.
+    Build the mini-map as a small Plotly figure of binned heatmap strips:
+    one element-density row per input file (stacked like the main plot's
+    y-offsets, hover lists the per-type counts) and one cryomodule coverage
+    row underneath.
     """
-    name_lower = icon_filename.lower()
-    if "qd" in name_lower or "qf" in name_lower or "qbtl" in name_lower or "ql" in name_lower:
-        return "Quadrupole"
-    elif "bpm" in name_lower:
-        return "Beam Position Monitor (BPM)"
-    elif "ycor" in name_lower or "xcor" in name_lower or "xycor" in name_lower:
-        return "Corrector"
-    elif "dpl" in name_lower or "dpll" in name_lower:
-        return "Dipole"
-    elif "sol" in name_lower or "solenoid" in name_lower:
-        return "Solenoid"
-    elif "cav" in name_lower:
-        return "Cavity"
-    elif "3ws" in name_lower or "xyws" in name_lower:
-        return "Wire Scanner"
-    elif "marker" in name_lower:
-        return "Marker"
-    else:
-        return "Unknown"
+    edges = minimap_bin_edges(x_min, x_max, n_bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    type_names = sorted(elements["type"].unique())
+    counts = bin_element_density(elements, len(row_labels), type_names, edges)
+    totals = counts.sum(axis=1)
+
+    hover = []
+    for row_index, label in enumerate(row_labels):
+        row_hover = []
+        for b in range(n_bins):
+            lines = [f"<b>{label}</b>",
+                     f"{edges[b]:.2f} - {edges[b + 1]:.2f} m",
+                     f"Elements: {totals[row_index, b]}"]
+            for t_index, t_name in enumerate(type_names):
+                if counts[row_index, t_index, b]:
+                    lines.append(f"{t_name}: {counts[row_index, t_index, b]}")
+            row_hover.append("<br>".join(lines))
+        hover.append(row_hover)
+
+    coverage = cryomodule_coverage(cryomodules, edges)
+    cm_hover = [f"<b>{MINIMAP_CRYOMODULE_ROW}</b><br>{edges[b]:.2f} - {edges[b + 1]:.2f} m<br>"
+                f"Coverage: {coverage[b] * 100:.0f}%" for b in range(n_bins)]
+
+    mini_fig = go.Figure()
+    mini_fig.add_trace(go.Heatmap(
+        x=centers.tolist(),
+        y=list(row_labels),
+        z=totals.tolist(),
+        text=hover,
+        hovertemplate="%{text}<extra></extra>",
+        colorscale=[[0, "white"], [0.001, RECT_FILL_COLOR], [1, RECT_LINE_COLOR]],
+        zmin=0,
+        showscale=False
+    ))
+    mini_fig.add_trace(go.Heatmap(
+        x=centers.tolist(),
+        y=[MINIMAP_CRYOMODULE_ROW],
+        z=[coverage.tolist()],
+        text=[cm_hover],
+        hovertemplate="%{text}<extra></extra>",
+        colorscale=[[0, "white"], [1, CRYOMODULE_COLOR]],
+        zmin=0,
+        zmax=1,
+        showscale=False
+    ))
+    mini_fig.update_layout(
+        margin=dict(l=110, r=20, t=10, b=30),
+        xaxis=dict(range=[edges[0], edges[-1]], showgrid=False, fixedrange=True),
+        yaxis=dict(
+            type="category",
+            categoryorder="array",
+            categoryarray=[MINIMAP_CRYOMODULE_ROW] + [
+                label for _, label in sorted(zip(row_offsets, row_labels))
+            ],
+            showgrid=False,
+            fixedrange=True
+        ),
+        shapes=[dict(
+            type="rect",
+            xref="x",
+            yref="paper",
+            x0=edges[0], x1=edges[-1],
+            y0=0, y1=1,
+            fillcolor="rgba(255,0,0,0.15)",
+            line=dict(color="Red", width=1)
+        )],
+        showlegend=False
+    )
+    return mini_fig
 
 # 1) File selection via tkinter
 root = tk.Tk()
@@ -91,9 +162,15 @@ icon_folder = filedialog.askdirectory(
     title="Select the folder containing element icons"
 )
 
+# Element type rules: element_types.json in the icon folder or next to this
+# script overrides the built-in table
+classifier = ElementClassifier(
+    find_type_rules(icon_folder, os.path.dirname(os.path.abspath(__file__)))
+)
+
 # Prepare the main figure
 fig = go.Figure()
-offset_step = 5
+offset_step = OFFSET_STEP
 n_files = len(file_paths)
 y_offsets = generate_symmetric_offsets(n_files, offset_step)
 
@@ -101,61 +178,34 @@ missing_dimensions_elements = []
 required_icons = set()
 cryomodules = {}
 
+# (file_index, icon name, location, length) per plotted element; classified in one
+# pass after the loop, then binned for the mini-map and summarised per type
+element_records = []
+
 # We'll track min/max x-limits for building the mini-map
 global_min_x = float('inf')
 global_max_x = float('-inf')
 
-# ============ Identify Cryomodules & Coerce Numeric Location ============
-for file_path in file_paths:
-    df = pd.read_excel(file_path)
-
-    # Force column #4 (location) to numeric, drop invalid
-    df.iloc[:, 4] = pd.to_numeric(df.iloc[:, 4], errors="coerce")
-    df = df.dropna(subset=[df.columns[4]])
-
-    # Clean element column (#1)
-    df.iloc[:, 1] = df.iloc[:, 1].astype(str).fillna('').str.strip()
-
-    # Remove cryomodule _CT rows if needed
-    df = df[~df.iloc[:, 1].str.contains('CM') | ~df.iloc[:, 1].str.contains('_CT')]
+# ============ Read Decks, Identify Cryomodules ============
+# Each deck is read and cleaned once (shared with the static renderer)
+decks = [read_lattice_file(file_path) for file_path in file_paths]
 
+for names, locations in decks:
     # Update global min/max
-    for idx in range(len(df)):
-        location = df.iloc[idx, 4]
-        if location < global_min_x:
-            global_min_x = location
-        if location > global_max_x:
-            global_max_x = location
+    if len(locations):
+        global_min_x = min(global_min_x, locations.min())
+        global_max_x = max(global_max_x, locations.max())
 
     # Check cryomodules
-    for idx in range(len(df)):
-        element = df.iloc[idx, 1]
-        location = df.iloc[idx, 4]
-        if 'CM' in element and ('_UP' in element or '_DN' in element):
-            cm_name = element.replace('_UP', '').replace('_DN', '')
-            if cm_name not in cryomodules:
-                cryomodules[cm_name] = {'start': None, 'end': None}
-            if '_UP' in element:
-                cryomodules[cm_name]['start'] = location
-            elif '_DN' in element:
-                cryomodules[cm_name]['end'] = location
+    extract_cryomodules(names, locations, cryomodules)
 
 # ============= Build the Lattice (Shapes, Icons, Traces) =============
-for file_index, file_path in enumerate(file_paths):
-    df = pd.read_excel(file_path)
-
-    # Coerce location column
-    df.iloc[:, 4] = pd.to_numeric(df.iloc[:, 4], errors="coerce")
-    df = df.dropna(subset=[df.columns[4]])
-
-    df.iloc[:, 1] = df.iloc[:, 1].astype(str).fillna('').str.strip()
-    df = df[~df.iloc[:, 1].str.contains('CM') | ~df.iloc[:, 1].str.contains('_CT')]
-
+for file_index, (names, locations) in enumerate(decks):
     y_offset = y_offsets[file_index]
 
-    for idx in range(len(df)):
-        element = df.iloc[idx, 1]
-        location = df.iloc[idx, 4]
+    for idx in range(len(names)):
+        element = names[idx]
+        location = locations[idx]
 
         if 'CM' in element:
             continue
@@ -175,24 +225,24 @@ for file_index, file_path in enumerate(file_paths):
             dn_location = None
             central_ct_location = None
 
-            for j in range(idx + 1, len(df)):
-                next_elem = df.iloc[j, 1]
+            for j in range(idx + 1, len(names)):
+                next_elem = names[j]
                 if '_DN' in next_elem and clean_element_name(next_elem) == clean_name:
-                    dn_location = df.iloc[j, 4]
+                    dn_location = locations[j]
                     break
 
             if dn_location is not None:
-                for j in range(idx + 1, len(df)):
-                    next_elem = df.iloc[j, 1]
+                for j in range(idx + 1, len(names)):
+                    next_elem = names[j]
                     if '_CT' in next_elem and clean_element_name(next_elem) == clean_name:
                         if '_P1_' not in next_elem and '_P2_' not in next_elem:
-                            central_ct_location = df.iloc[j, 4]
+                            central_ct_location = locations[j]
                             break
                 if central_ct_location is None:
-                    for j in range(idx + 1, len(df)):
-                        next_elem = df.iloc[j, 1]
+                    for j in range(idx + 1, len(names)):
+                        next_elem = names[j]
                         if '_CT' in next_elem and clean_element_name(next_elem) == clean_name:
-                            central_ct_location = df.iloc[j, 4]
+                            central_ct_location = locations[j]
                             break
                     if central_ct_location is None:
                         print(f"No _CT found for {element}, skipping.")
@@ -205,7 +255,7 @@ for file_index, file_path in enumerate(file_paths):
                         type="line",
                         x0=up_location, x1=up_location,
                         y0=y_offset - 0.5, y1=y_offset + 0.5,
-                        line=dict(color="Red", dash="dash"),
+                        line=dict(color=LINE_COLORS["zero_length"], dash="dash"),
                         label=dict(
                             text=clean_name,
                             font=dict(color="rgba(0,0,0,0)", size=1)
@@ -218,7 +268,7 @@ for file_index, file_path in enumerate(file_paths):
                         x=[up_location],
                         y=[y_offset],
                         mode="markers",
-                        marker=dict(size=5, color="red"),
+                        marker=dict(size=5, color=LINE_COLORS["zero_length"]),
                         hoverinfo="text",
                         text=[hover_txt],
                         name=clean_name,
@@ -226,6 +276,7 @@ for file_index, file_path in enumerate(file_paths):
                         hovertemplate="%{text}<extra></extra>"
                     )
                     fig.add_trace(trace)
+                    element_records.append((file_index, icon_name, up_location, 0.0))
                 else:
                     y0 = y_offset - (FIXED_ELEMENT_HEIGHT / 2)
                     y1 = y_offset + (FIXED_ELEMENT_HEIGHT / 2)
@@ -234,9 +285,9 @@ for file_index, file_path in enumerate(file_paths):
                         type="rect",
                         x0=up_location, x1=dn_location,
                         y0=y0, y1=y1,
-                        line=dict(color="RoyalBlue"),
-                        fillcolor="LightSkyBlue",
-                        opacity=0.3,
+                        line=dict(color=RECT_LINE_COLOR),
+                        fillcolor=RECT_FILL_COLOR,
+                        opacity=RECT_OPACITY,
                         label=dict(
                             text=clean_name,
                             font=dict(color="rgba(0,0,0,0)", size=1)
@@ -278,13 +329,14 @@ for file_index, file_path in enumerate(file_paths):
                         hovertemplate="%{text}<extra></extra>"
                     )
                     fig.add_trace(trace)
+                    element_records.append((file_index, icon_name, central_ct_location, length))
             else:
                 # _UP but no _DN
                 shape = dict(
                     type="line",
                     x0=up_location, x1=up_location,
                     y0=y_offset - 0.5, y1=y_offset + 0.5,
-                    line=dict(color="Orange", dash="dash"),
+                    line=dict(color=LINE_COLORS["up_only"], dash="dash"),
                     label=dict(
                         text=clean_name,
                         font=dict(color="rgba(0,0,0,0)", size=1)
@@ -297,7 +349,7 @@ for file_index, file_path in enumerate(file_paths):
                     x=[up_location],
                     y=[y_offset],
                     mode="markers",
-                    marker=dict(size=5, color="orange"),
+                    marker=dict(size=5, color=LINE_COLORS["up_only"]),
                     hoverinfo="text",
                     text=[hover_txt],
                     name=clean_name,
@@ -305,16 +357,17 @@ for file_index, file_path in enumerate(file_paths):
                     hovertemplate="%{text}<extra></extra>"
                 )
                 fig.add_trace(trace)
+                element_records.append((file_index, icon_name, up_location, 0.0))
 
         elif '_CT' in element and not (
-            '_UP' in df.iloc[idx - 1, 1] and '_DN' in df.iloc[idx + 1, 1]
+            '_UP' in names[idx - 1] and '_DN' in names[idx + 1]
         ):
             # Single-line element
             shape = dict(
                 type="line",
                 x0=location, x1=location,
                 y0=y_offset - 0.5, y1=y_offset + 0.5,
-                line=dict(color="Green", dash="dash"),
+                line=dict(color=LINE_COLORS["single_ct"], dash="dash"),
                 label=dict(
                     text=clean_name,
                     font=dict(color="rgba(0,0,0,0)", size=1)
@@ -327,7 +380,7 @@ for file_index, file_path in enumerate(file_paths):
                 x=[location],
                 y=[y_offset],
                 mode="markers",
-                marker=dict(size=5, color="green"),
+                marker=dict(size=5, color=LINE_COLORS["single_ct"]),
                 hoverinfo="text",
                 text=[hover_txt],
                 name=clean_name,
@@ -335,17 +388,18 @@ for file_index, file_path in enumerate(file_paths):
                 hovertemplate="%{text}<extra></extra>"
             )
             fig.add_trace(trace)
+            element_records.append((file_index, icon_name, location, 0.0))
             missing_dimensions_elements.append(f"{clean_name} at {location:.2f} m")
 
         elif '_DN' in element and not any(
-            '_UP' in df.iloc[j, 1] and clean_element_name(df.iloc[j, 1]) == clean_name
+            '_UP' in names[j] and clean_element_name(names[j]) == clean_name
             for j in range(0, idx)
         ):
             shape = dict(
                 type="line",
                 x0=location, x1=location,
                 y0=y_offset - 0.5, y1=y_offset + 0.5,
-                line=dict(color="Purple", dash="dash"),
+                line=dict(color=LINE_COLORS["dn_only"], dash="dash"),
                 label=dict(
                     text=clean_name,
                     font=dict(color="rgba(0,0,0,0)", size=1)
@@ -358,7 +412,7 @@ for file_index, file_path in enumerate(file_paths):
                 x=[location],
                 y=[y_offset],
                 mode="markers",
-                marker=dict(size=5, color="purple"),
+                marker=dict(size=5, color=LINE_COLORS["dn_only"]),
                 hoverinfo="text",
                 text=[hover_txt],
                 name=clean_name,
@@ -366,12 +420,13 @@ for file_index, file_path in enumerate(file_paths):
                 hovertemplate="%{text}<extra></extra>"
             )
             fig.add_trace(trace)
+            element_records.append((file_index, icon_name, location, 0.0))
 
 # ============== Plot Cryomodules ==============
-for cm_name, boundaries in cryomodules.items():
-    if boundaries['start'] is not None and boundaries['end'] is not None:
-        up_location = boundaries['start']
-        dn_location = boundaries['end']
+for cm_name, (cm_start, cm_end) in cryomodules.items():
+    if cm_start is not None and cm_end is not None:
+        up_location = cm_start
+        dn_location = cm_end
         if up_location > dn_location:
             up_location, dn_location = dn_location, up_location
         cm_length = dn_location - up_location
@@ -381,9 +436,9 @@ for cm_name, boundaries in cryomodules.items():
             x0=up_location, x1=dn_location,
             y0=min(y_offsets) - 1,
             y1=max(y_offsets) + 1,
-            line=dict(color="Gray"),
-            fillcolor="Gray",
-            opacity=0.4,
+            line=dict(color=CRYOMODULE_COLOR),
+            fillcolor=CRYOMODULE_COLOR,
+            opacity=CRYOMODULE_OPACITY,
             label=dict(
                 text=f"CRYOMODULE-{cm_name}",
                 font=dict(color="rgba(0,0,0,0)", size=1)
@@ -398,7 +453,7 @@ for cm_name, boundaries in cryomodules.items():
             x=[(up_location + dn_location) / 2],
             y=[0],
             mode="markers",
-            marker=dict(size=5, color="gray"),
+            marker=dict(size=5, color=CRYOMODULE_COLOR),
             hoverinfo="text",
             text=[hover_txt],
             showlegend=False,
@@ -434,6 +489,30 @@ shapes_json = json.dumps(original_shapes)
 images_json = json.dumps(original_images)
 layout_json = json.dumps(layout_for_json)
 
+# ============== Classify elements, per-type summary ==============
+elements_df = pd.DataFrame(element_records, columns=["file_index", "icon", "location", "length"])
+elements_df["type"] = classifier.classify_many(elements_df["icon"])
+
+file_labels = [f"{i + 1}: {os.path.basename(p)}" for i, p in enumerate(file_paths)]
+type_summary = elements_df.groupby("type").agg(
+    elements=("type", "size"),
+    total_length=("length", "sum")
+)
+type_counts_per_file = (
+    elements_df.groupby(["type", "file_index"]).size()
+    .unstack(fill_value=0)
+    .reindex(index=type_summary.index, columns=range(n_files), fill_value=0)
+)
+type_summary = type_summary.sort_values("elements", ascending=False)
+
+# ============== Mini-map (precomputed density strips) ==============
+mini_fig = build_minimap_figure(
+    elements_df, file_labels, y_offsets, cryomodules, global_min_x, global_max_x
+)
+mini_dict = mini_fig.to_dict()
+mini_data_json = json.dumps(mini_dict["data"])
+mini_layout_json = json.dumps(mini_dict["layout"])
+
 plot_html = fig.to_html(
     full_html=False,
     include_plotlyjs=False,
@@ -441,9 +520,12 @@ plot_html = fig.to_html(
 )
 
 # Build a list of icons (sorted) plus guessed types, plus a "Preview" if found
+icon_filenames = sorted(required_icons)
+# Classify the icon stem (no .svg), the same key elements_df uses, so anchored
+# regex rules give one type per icon across every view
+icon_types = classifier.classify_many([os.path.splitext(f)[0] for f in icon_filenames])
 icon_rows = []
-for icon_filename in sorted(required_icons):
-    guessed = guess_icon_type(icon_filename)
+for icon_filename, guessed in zip(icon_filenames, icon_types):
     icon_path = os.path.join(icon_folder, icon_filename)
     if os.path.exists(icon_path):
         # Generate a small thumbnail (e.g. 40px wide)
@@ -494,8 +576,8 @@ with open(output_html, "w", encoding="utf-8") as f:
         }}
         /* mini-map styling */
         #miniPlot {{
-            width: 500px;
-            height: 100px;
+            width: 100%;
+            height: {60 + 18 * (n_files + 1)}px;
             border: 1px solid #ccc;
             margin-top: 10px;
         }}
@@ -530,6 +612,7 @@ with open(output_html, "w", encoding="utf-8") as f:
   <button class="tablinks" onclick="openTab(event, 'MissingDim')">Missing Dim Elements</button>
   <button class="tablinks" onclick="openTab(event, 'RequiredIcons')">Required Icons</button>
   <button class="tablinks" onclick="openTab(event, 'IconsTable')">Icons Table</button>
+  <button class="tablinks" onclick="openTab(event, 'TypeSummary')">Element Types</button>
 </div>
 
 <div id="Plot" class="tabcontent">
@@ -563,6 +646,22 @@ with open(output_html, "w", encoding="utf-8") as f:
 
     f.write("</tbody></table></div>\n")
 
+    # Per-type counts and total lengths from the classifier
+    f.write("<div id='TypeSummary' class='tabcontent'><h3>Element Types Summary</h3>\n")
+    f.write("<table class='icons-table'><thead><tr>")
+    f.write("<th>Type</th><th>Count</th><th>Total Length (m)</th>")
+    for label in file_labels:
+        f.write(f"<th>{label}</th>")
+    f.write("</tr></thead><tbody>\n")
+
+    for row in type_summary.itertuples():
+        f.write(f"<tr><td>{row.Index}</td><td>{row.elements}</td><td>{row.total_length:.2f}</td>")
+        for count in type_counts_per_file.loc[row.Index]:
+            f.write(f"<td>{count}</td>")
+        f.write("</tr>\n")
+
+    f.write("</tbody></table></div>\n")
+
     f.write(f"""
 <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
 <script>
@@ -644,58 +743,50 @@ with open(output_html, "w", encoding="utf-8") as f:
   document.getElementById("defaultOpen").click();
 
   // =============== MINI-PLOT ===============
+  // Density strips are binned in Python; the browser only moves the viewport box.
   var miniDiv = document.getElementById('miniPlot');
-  var minVal = {float(global_min_x)};
-  var maxVal = {float(global_max_x)};
-
-  var miniData = [{{
-    x: [minVal, maxVal],
-    y: [0, 0],
-    mode: 'lines',
-    line: {{color:'black'}},
-    hoverinfo:'none',
-    showlegend:false
-  }}];
-
-  var highlightShape = {{
-    type:'rect',
-    xref:'x',
-    yref:'y',
-    x0: minVal,
-    x1: maxVal,
-    y0:-0.3,
-    y1:0.3,
-    fillcolor:'rgba(255,0,0,0.3)',
-    line:{{width:0}}
-  }};
-
-  var miniLayout = {{
-    margin: {{l:40, r:20, t:20, b:20}},
-    xaxis: {{
-      range:[minVal-5, maxVal+5],
-      showgrid:false
-    }},
-    yaxis: {{
-      range:[-1,1],
-      showgrid:false
-    }},
-    shapes:[highlightShape]
-  }};
+  var miniData = {mini_data_json};
+  var miniLayout = {mini_layout_json};
 
-  Plotly.newPlot(miniDiv, miniData, miniLayout, {{staticPlot:true}});
+  Plotly.newPlot(miniDiv, miniData, miniLayout, {{displayModeBar:false, scrollZoom:false}});
 
-  graphDiv.on('plotly_relayout', function(ev) {{
-    if(ev['xaxis.range[0]']!==undefined && ev['xaxis.range[1]']!==undefined) {{
-      let left = ev['xaxis.range[0]'];
-      let right = ev['xaxis.range[1]'];
+  // Coalesce pan/zoom events into at most one mini-map update per frame
+  var pendingRange = null;
+  var viewportFrame = null;
 
+  function scheduleViewport(left, right) {{
+    pendingRange = [left, right];
+    if(viewportFrame !== null) return;
+    viewportFrame = window.requestAnimationFrame(function() {{
+      viewportFrame = null;
       Plotly.relayout(miniDiv, {{
-        'shapes[0].x0': left,
-        'shapes[0].x1': right
-      }}, [{{
-        transition: {{duration:500, easing:'cubic-in-out'}}
-      }}]);
+        'shapes[0].x0': pendingRange[0],
+        'shapes[0].x1': pendingRange[1]
+      }});
+    }});
+  }}
+
+  function onMainRangeChange(ev) {{
+    if(ev['xaxis.range[0]']!==undefined && ev['xaxis.range[1]']!==undefined) {{
+      scheduleViewport(ev['xaxis.range[0]'], ev['xaxis.range[1]']);
+    }} else if(ev['xaxis.range']!==undefined) {{
+      scheduleViewport(ev['xaxis.range'][0], ev['xaxis.range'][1]);
+    }} else if(ev['xaxis.autorange']) {{
+      var r = graphDiv.layout.xaxis.range;
+      scheduleViewport(r[0], r[1]);
     }}
+  }}
+
+  graphDiv.on('plotly_relayout', onMainRangeChange);
+  graphDiv.on('plotly_relayouting', onMainRangeChange);
+
+  // Click-to-jump: recenter the main plot on the clicked bin, keeping the zoom width
+  miniDiv.on('plotly_click', function(ev) {{
+    if(!ev.points || !ev.points.length) return;
+    var center = ev.points[0].x;
+    var r = graphDiv.layout.xaxis.range;
+    var half = (r[1] - r[0]) / 2;
+    Plotly.relayout(graphDiv, {{'xaxis.range': [center - half, center + half]}});
   }});
 </script>
 </body>